@@ -1,18 +1,13 @@
 import schedule
+import sys
 import time
 import subprocess
 from datetime import datetime
 import logging
 
 log_filename = "D:\\CODES\\BSE_AUTO\\scheme_of_arrangement_log.txt"
-logging.basicConfig(
-    filename=log_filename,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-
-def run_scripts():
+
+def run_scripts(pipelined=False):
     # Check if the current time is after 6 PM   
     current_time = datetime.now().time()
     cutoff_time = datetime.strptime("23:55","%H:%M").time()
@@ -26,6 +21,9 @@ def run_scripts():
         "D:\\CODES\\BSE_AUTO\\TEXT_FROM_PDF.py", 
         "D:\\CODES\\BSE_AUTO\\SCHEME_FILTER.py"
     ]
+    if pipelined:
+        # Download, extraction and matching overlap with scraping in one process
+        scripts = ["D:\\CODES\\BSE_AUTO\\PIPELINE.py"]
 
     for script in scripts:
         try:
@@ -40,18 +38,29 @@ def run_scripts():
 
     return True  # Continue scheduling
 
-def scheduled_task():
+def scheduled_task(pipelined=False):
     # Run scripts and stop if it returns False
-    if not run_scripts():
+    if not run_scripts(pipelined):
         logging.info("Exiting scheduler.")
         print("Exiting scheduler.")
         return schedule.CancelJob  # Stops all scheduled jobs
 
-schedule.every(5).minutes.do(scheduled_task)
-logging.info("Scheduled task set to run every 5 minutes.")
-print("Scheduled task to run every 5 minutes.")
+def main():
+    logging.basicConfig(
+        filename=log_filename,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+    pipelined = "--pipelined" in sys.argv
+    schedule.every(5).minutes.do(scheduled_task, pipelined)
+    logging.info("Scheduled task set to run every 5 minutes.")
+    print("Scheduled task to run every 5 minutes.")
 
-while True:
-    schedule.run_pending()
-    time.sleep(1)
+    while True:
+        schedule.run_pending()
+        time.sleep(1)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import os
+import re
+import random
+import hashlib
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+import SHARED_STORE
+
+# MinHash signatures are split into LSH bands; two filings land in the same
+# bucket when one whole band matches, so only likely near-duplicates are compared.
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+HEADING_THRESHOLD = 0.8
+BODY_THRESHOLD = 0.9
+STRICT_BODY_THRESHOLD = 0.95
+RECENT_WINDOW = timedelta(hours=24)
+
+_PRIME = (1 << 61) - 1
+_random = random.Random(20241018)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize(text):
+    text = re.sub(r'[^a-z0-9]+', ' ', str(text or '').lower())
+    return text.strip()
+
+
+def char_shingles(text, size=5):
+    text = normalize(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def word_shingles(text, size=3):
+    words = normalize(text).split()
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingles):
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(signature, other):
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+
+def company_key(heading):
+    return normalize(str(heading or '').split(' - ')[0])
+
+
+def announcement_key(row):
+    pdf_link = row.get('PDF LINK')
+    if isinstance(pdf_link, str) and pdf_link:
+        return pdf_link
+    return f"{row.get('HEADING')}|{row.get('INSIDER')}"
+
+
+def parse_insider_time(insider):
+    match = re.search(r'(\d{2}-\d{2}-\d{4} \d{2}:\d{2}:\d{2})', str(insider or ''))
+    return datetime.strptime(match.group(1), "%d-%m-%Y %H:%M:%S") if match else datetime.now()
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold, window=RECENT_WINDOW):
+        self.threshold = threshold
+        self.window = window
+        self._entries = {}
+        self._buckets = defaultdict(set)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _bands(self, signature):
+        for band in range(BANDS):
+            yield band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+
+    def signature(self, key):
+        return self._entries[key][1]
+
+    def add(self, key, company, signature, timestamp):
+        self._entries[key] = (company, signature, timestamp)
+        for band in self._bands(signature):
+            self._buckets[band].add(key)
+
+    def remove(self, key):
+        _, signature, _ = self._entries.pop(key)
+        for band in self._bands(signature):
+            self._buckets[band].discard(key)
+
+    def evict(self, now):
+        for key in [k for k, (_, _, t) in self._entries.items() if now - t > self.window]:
+            self.remove(key)
+
+    def find(self, company, signature, timestamp):
+        # Best earlier filing from the same company above the threshold.
+        candidates = set()
+        for band in self._bands(signature):
+            candidates |= self._buckets.get(band, set())
+
+        best_key, best_similarity = None, self.threshold
+        for key in candidates:
+            other_company, other_signature, other_time = self._entries[key]
+            if other_company != company or abs(timestamp - other_time) > self.window:
+                continue
+            score = similarity(signature, other_signature)
+            if score >= best_similarity:
+                best_key, best_similarity = key, score
+        return best_key
+
+
+def file_digest(pdf_path):
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as pdf_file:
+        for chunk in iter(lambda: pdf_file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AnnouncementDeduplicator:
+    # Headings are templated, so a heading/announcement match only proposes a
+    # candidate. A filing is linked as a duplicate only when its attachment is
+    # byte-identical to an earlier one, or its extracted body matches. A body
+    # match needs the heading candidate, or a stricter threshold without one.
+    # A filing whose own heading carries a watched keyword is never folded
+    # into one whose heading did not, and bodies only match when both or
+    # neither carry the keyword.
+    def __init__(self, fingerprint_file, keywords_pattern=None):
+        self.fingerprint_file = fingerprint_file
+        self.keywords_pattern = keywords_pattern
+        self.headings = NearDuplicateIndex(HEADING_THRESHOLD)
+        self.bodies = NearDuplicateIndex(BODY_THRESHOLD)
+        self.attachments = {}
+        self.attachment_owners = {}
+        self.candidate_of = {}
+        self.duplicate_of = {}
+        self.keyword_keys = set()
+        self.body_keyword_keys = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        # The previous day's log is read too, so the 24-hour window reaches
+        # across midnight
+        root, day = fingerprint_day(self.fingerprint_file)
+        if day is not None:
+            previous_day = day - timedelta(days=1)
+            previous_file = os.path.join(
+                root, previous_day.strftime('%Y'), previous_day.strftime('%m'), previous_day.strftime('%d'),
+                "FINGERPRINTS", "fingerprints.csv"
+            )
+            self._load_rows(previous_file, since=day - RECENT_WINDOW)
+        self._load_rows(self.fingerprint_file)
+
+    def _load_rows(self, fingerprint_file, since=None):
+        if not os.path.isfile(fingerprint_file):
+            return
+        _, rows, _ = SHARED_STORE.read_new_rows(fingerprint_file)
+        for row in rows:
+            key, company, kind = row['KEY'], row['COMPANY'], row['KIND']
+            timestamp = datetime.strptime(row['TIME'], "%Y-%m-%d %H:%M:%S")
+            if since is not None and timestamp < since:
+                continue
+            if row.get('KEYWORD'):
+                (self.body_keyword_keys if kind == 'body' else self.keyword_keys).add(key)
+            if kind == 'attachment':
+                self.attachments[key] = row['SIGNATURE']
+                self.attachment_owners.setdefault((company, row['SIGNATURE']), key)
+            else:
+                signature = tuple(int(value) for value in row['SIGNATURE'].split())
+                index = self.headings if kind == 'heading' else self.bodies
+                index.add(key, company, signature, timestamp)
+            if row['DUPLICATE OF']:
+                # A heading match is only a candidate; older logs may hold
+                # heading-only links, which are not trusted as duplicates
+                if kind == 'heading':
+                    self.candidate_of[key] = row['DUPLICATE OF']
+                else:
+                    self.duplicate_of[key] = row['DUPLICATE OF']
+
+    def _has_keyword(self, row):
+        return self._text_has_keyword(f"{row.get('HEADING') or ''} {row.get('ANNOUNCEMENT') or ''}")
+
+    def _text_has_keyword(self, text):
+        if not self.keywords_pattern:
+            return False
+        return re.search(self.keywords_pattern, text, re.IGNORECASE) is not None
+
+    def _confirm(self, key, original, row):
+        # Called with the lock held
+        if original is None or original == key:
+            return None
+        original = self.duplicate_of.get(original, original)
+        if self._has_keyword(row) and original not in self.keyword_keys:
+            return None
+        self.duplicate_of[key] = original
+        return original
+
+    def _log(self, kind, key, company, signature, timestamp, linked, keyword=None):
+        if keyword is None:
+            keyword = key in self.keyword_keys
+        SHARED_STORE.append_rows(self.fingerprint_file, [{
+            'KIND': kind,
+            'KEY': key,
+            'COMPANY': company,
+            'SIGNATURE': signature,
+            'TIME': timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            'KEYWORD': 1 if keyword else '',
+            'DUPLICATE OF': linked or '',
+        }])
+
+    def find_candidate(self, row):
+        # Fingerprints HEADING + ANNOUNCEMENT and returns the earlier filing it
+        # resembles. This never marks the row as a duplicate on its own.
+        key = announcement_key(row)
+        signature = minhash(char_shingles(f"{row.get('HEADING') or ''} {row.get('ANNOUNCEMENT') or ''}"))
+        if signature is None:
+            return None
+        company = company_key(row.get('HEADING'))
+        timestamp = parse_insider_time(row.get('INSIDER'))
+        with self._lock:
+            if key in self.headings:
+                return self.candidate_of.get(key)
+            if self._has_keyword(row):
+                self.keyword_keys.add(key)
+            candidate = self.headings.find(company, signature, timestamp)
+            if candidate is not None:
+                self.candidate_of[key] = candidate
+            self.headings.add(key, company, signature, timestamp)
+            self.headings.evict(timestamp)
+        self._log('heading', key, company, ' '.join(str(value) for value in signature), timestamp, candidate)
+        return candidate
+
+    def check_attachment(self, row, pdf_path):
+        # Same company, byte-identical attachment: the filing is a duplicate
+        # whatever its heading says.
+        key = announcement_key(row)
+        digest = file_digest(pdf_path)
+        company = company_key(row.get('HEADING'))
+        with self._lock:
+            if key in self.attachments:
+                return self.duplicate_of.get(key)
+            if self._has_keyword(row):
+                self.keyword_keys.add(key)
+            original = self._confirm(key, self.attachment_owners.get((company, digest)), row)
+            self.attachments[key] = digest
+            self.attachment_owners.setdefault((company, digest), key)
+        self._log('attachment', key, company, digest, parse_insider_time(row.get('INSIDER')), original)
+        return original
+
+    def check_body(self, row, extracted_text):
+        key = announcement_key(row)
+        signature = minhash(word_shingles(extracted_text))
+        if signature is None:
+            return self.duplicate_of.get(key)
+        company = company_key(row.get('HEADING'))
+        timestamp = parse_insider_time(row.get('INSIDER'))
+        with self._lock:
+            if key in self.duplicate_of or key in self.bodies:
+                return self.duplicate_of.get(key)
+            if self._has_keyword(row):
+                self.keyword_keys.add(key)
+            body_keyword = self._text_has_keyword(extracted_text)
+            if body_keyword:
+                self.body_keyword_keys.add(key)
+            match = self.bodies.find(company, signature, timestamp)
+            if match is not None and match != self.candidate_of.get(key):
+                # Without a matching heading candidate, only a near-identical body counts
+                if similarity(signature, self.bodies.signature(match)) < STRICT_BODY_THRESHOLD:
+                    match = None
+            if match is not None and (match in self.body_keyword_keys) != body_keyword:
+                # A revised copy that adds or drops the keyword is a new filing
+                match = None
+            original = self._confirm(key, match, row)
+            self.bodies.add(key, company, signature, timestamp)
+            self.bodies.evict(timestamp)
+        self._log('body', key, company, ' '.join(str(value) for value in signature), timestamp, original, body_keyword)
+        return original
+
+    def original_of(self, row):
+        return self.duplicate_of.get(announcement_key(row))
+
+
+def fingerprint_day(fingerprint_file):
+    # <root>/YYYY/MM/DD/FINGERPRINTS/fingerprints.csv -> (root, that day at midnight)
+    day_folder = os.path.dirname(os.path.dirname(os.path.abspath(fingerprint_file)))
+    month_folder, day = os.path.split(day_folder)
+    year_folder, month = os.path.split(month_folder)
+    root, year = os.path.split(year_folder)
+    try:
+        return root, datetime(int(year), int(month), int(day))
+    except ValueError:
+        return root, None
+
+
+def fingerprint_path(date_folder_path):
+    # Kept in its own folder so it is not mistaken for an announcements CSV
+    fingerprint_dir = os.path.join(date_folder_path, "FINGERPRINTS")
+    os.makedirs(fingerprint_dir, exist_ok=True)
+    return os.path.join(fingerprint_dir, "fingerprints.csv")
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import tempfile
+import TEXT_FROM_PDF
+
+# Phrases the alerting cares about; recall is measured against the full-quality OCR text.
+KEYWORDS = [
+    "Scheme Of Arrangement",
+    "Amalgamation",
+    "Demerger",
+    "Merger",
+    "Acquisition",
+    "Board Meeting",
+    "Dividend",
+    "Buyback",
+    "Bonus",
+    "Split",
+]
+
+
+def count_pages(pdf_path):
+    with TEXT_FROM_PDF.fitz_lock, TEXT_FROM_PDF.fitz.open(pdf_path) as pdf_document:
+        return pdf_document.page_count
+
+
+def found_keywords(text):
+    text = text.lower()
+    return {keyword for keyword in KEYWORDS if keyword.lower() in text}
+
+
+def run_benchmark(corpus_dir):
+    pdf_files = sorted(f for f in os.listdir(corpus_dir) if f.lower().endswith('.pdf') and not f.endswith('_ocr.pdf'))
+    if not pdf_files:
+        print(f"No PDFs found in '{corpus_dir}'.")
+        return
+
+    totals = {"pages": 0, "full_seconds": 0.0, "tiered_seconds": 0.0, "expected": 0, "recalled": 0}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for pdf_file in pdf_files:
+            pdf_path = os.path.join(corpus_dir, pdf_file)
+            full_output = os.path.join(work_dir, "full_" + pdf_file)
+            tiered_output = os.path.join(work_dir, "tiered_" + pdf_file)
+
+            start = time.perf_counter()
+            TEXT_FROM_PDF.ocr_pdf(pdf_path, full_output)
+            full_text = TEXT_FROM_PDF.extract_text_from_pdf(full_output)
+            full_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            tiered_text = TEXT_FROM_PDF.ocr_pdf_tiered(pdf_path, tiered_output)
+            tiered_seconds = time.perf_counter() - start
+
+            expected = found_keywords(full_text)
+            recalled = expected & found_keywords(tiered_text)
+            pages = count_pages(pdf_path)
+
+            totals["pages"] += pages
+            totals["full_seconds"] += full_seconds
+            totals["tiered_seconds"] += tiered_seconds
+            totals["expected"] += len(expected)
+            totals["recalled"] += len(recalled)
+            print(
+                f"{pdf_file}: {pages} pages, full {full_seconds:.1f}s, tiered {tiered_seconds:.1f}s, "
+                f"keywords {len(recalled)}/{len(expected)}"
+            )
+
+    stats = TEXT_FROM_PDF.ocr_stats
+    escalation_rate = stats["escalated_pages"] / max(stats["pages"], 1)
+    recall = totals["recalled"] / totals["expected"] if totals["expected"] else 1.0
+    print()
+    print(f"Documents: {len(pdf_files)}, pages: {totals['pages']}")
+    print(f"Full-quality OCR: {totals['full_seconds']:.1f}s ({totals['pages'] / max(totals['full_seconds'], 1e-9):.2f} pages/s)")
+    print(f"Tiered OCR:       {totals['tiered_seconds']:.1f}s ({totals['pages'] / max(totals['tiered_seconds'], 1e-9):.2f} pages/s)")
+    print(f"Speed-up: {totals['full_seconds'] / max(totals['tiered_seconds'], 1e-9):.2f}x, escalation rate {escalation_rate:.0%}")
+    print(f"Keyword recall vs full-quality OCR: {recall:.1%} ({totals['recalled']}/{totals['expected']})")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python OCR_BENCHMARK.py <folder of scanned PDFs>")
+        sys.exit(1)
+    run_benchmark(sys.argv[1])
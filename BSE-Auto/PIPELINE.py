@@ -0,0 +1,255 @@
+import os
+import re
+import sys
+import time
+import threading
+from datetime import datetime
+import SHARED_STORE
+import SCRAP_DATA
+import TEXT_FROM_PDF
+import SCHEME_FILTER
+import DEDUP
+import PRIORITY
+
+# Marks the end of the stream; each stage forwards it to the next one.
+STOP = object()
+
+
+def start_stage(name, worker, in_queue, out_queue=None, stop_queue=None):
+    # The stop marker goes to `stop_queue` when the stage feeds a side queue
+    # that must drain before the stream ends.
+    stop_queue = stop_queue or out_queue
+
+    def loop():
+        while True:
+            item = in_queue.get()
+            if item is STOP:
+                if stop_queue is not None:
+                    stop_queue.put(STOP)
+                break
+            try:
+                result = worker(item)
+            except Exception as e:
+                print(f"{name} stage failed for '{item['row'].get('PDF LINK')}': {e}")
+                continue
+            if out_queue is not None and result is not None:
+                out_queue.put(result)
+
+    thread = threading.Thread(target=loop, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def read_extracted_texts(extracted_file):
+    if not os.path.isfile(extracted_file) or os.stat(extracted_file).st_size == 0:
+        return {}
+    try:
+        df = SHARED_STORE.read_csv(extracted_file, on_bad_lines='skip')
+    except Exception as e:
+        print(f"Error reading existing extracted file '{extracted_file}': {e}")
+        return {}
+    df = df[(df['flag'] == 1) & df['PDF LINK'].notna()]
+    return dict(zip(df['PDF LINK'], df['Extracted Data'].fillna('')))
+
+
+def unfinished_announcements(file_path, already_extracted):
+    # Rows saved by an earlier run whose item was dropped or cut short before
+    # a flagged extracted row was written; the scrape cursor is already past them.
+    if not os.path.isfile(file_path) or os.stat(file_path).st_size == 0:
+        return []
+    try:
+        df = SHARED_STORE.read_csv(file_path, on_bad_lines='skip')
+    except Exception as e:
+        print(f"Error reading announcements file '{file_path}': {e}")
+        return []
+    df = df[df['PDF LINK'].notna() & ~df['PDF LINK'].isin(already_extracted)]
+    return df.fillna('').to_dict('records')
+
+
+def usable_texts(extracted_texts):
+    return {link: text for link, text in extracted_texts.items() if TEXT_FROM_PDF.has_usable_text(text)}
+
+
+def run_pipeline(target_date, output_path, output_dir, company_names, previous_announcements_file, queue_size=16):
+    # Each announcement moves through download, extract and match as soon as
+    # it is scraped. Bounded queues make a slow stage hold back the scraper.
+    print(f"Starting pipelined run for date: {target_date}")
+
+    day, month, year = target_date.split("-")
+    scheme_date = f"{year}-{month}-{day}"
+    file_path = SCRAP_DATA.announcement_csv_path(output_path, target_date)
+    extracted_file = TEXT_FROM_PDF.extracted_csv_path(file_path)
+    pdf_folder_path = os.path.join(os.path.dirname(file_path), "PDFs")
+    os.makedirs(pdf_folder_path, exist_ok=True)
+    log_file_path = os.path.join(output_path, "Scheme_extraction_errors_log.csv")
+
+    already_extracted = read_extracted_texts(extracted_file)
+    extracted_texts = usable_texts(already_extracted)
+    deduplicator = DEDUP.AnnouncementDeduplicator(DEDUP.fingerprint_path(os.path.dirname(file_path)), SCHEME_FILTER.keywords_pattern)
+    previous_announcements_df = SCHEME_FILTER.load_previous_announcements(previous_announcements_file)
+    alerted_companies = set()
+    alerted_links = SCHEME_FILTER.load_alerted_links(output_dir)
+    latency = PRIORITY.LatencyStats()
+
+    def download(item):
+        row = item["row"]
+        pdf_link = row["PDF LINK"]
+        # A heading match is only a candidate; the attachment or the
+        # extracted body has to confirm it
+        deduplicator.find_candidate(row)
+        item["duplicate_of"] = None
+        if pdf_link:
+            pdf_path = os.path.join(pdf_folder_path, SCRAP_DATA.pdf_file_name(pdf_link, row["HEADING"], row["CATEGORY"]))
+            if not os.path.exists(pdf_path):
+                pdf_path = SCRAP_DATA.download_pdf(pdf_link, pdf_folder_path, row["HEADING"], row["CATEGORY"])
+            item["pdf_path"] = pdf_path
+            if pdf_path:
+                item["duplicate_of"] = deduplicator.check_attachment(row, pdf_path)
+        return item
+
+    def extract(item):
+        row = item["row"]
+        pdf_link = row["PDF LINK"]
+        if pdf_link in already_extracted:
+            return None
+
+        if item["duplicate_of"] in extracted_texts:
+            # Same attachment as an earlier filing; its extraction is reused
+            extracted_text = extracted_texts[item["duplicate_of"]]
+        elif item.get("pdf_path"):
+            extracted_text = TEXT_FROM_PDF.extract_text_with_ocr(item["pdf_path"], row["HEADING"], pdf_link, log_file_path, target_date, defer_ocr=True)
+            if extracted_text is None:
+                # Scanned PDF: hand it to the OCR stage so this stage stays free
+                ocr_queue.put(item)
+                return None
+        elif pdf_link:
+            TEXT_FROM_PDF.log_error(log_file_path, row["HEADING"], pdf_link, "PDF file not found", target_date)
+            extracted_text = f"PDF file for link {pdf_link} not found in {pdf_folder_path}"
+        else:
+            extracted_text = ""
+
+        return save_extracted(item, extracted_text)
+
+    def ocr(item):
+        row = item["row"]
+
+        def preempt():
+            # A waiting scan with a higher priority is OCR'd before this one continues
+            while True:
+                waiting = ocr_queue.get_if_higher(item["score"])
+                if waiting is None:
+                    break
+                try:
+                    match_queue.put(ocr(waiting))
+                except Exception as e:
+                    print(f"ocr stage failed for '{waiting['row'].get('PDF LINK')}': {e}")
+
+        extracted_text = TEXT_FROM_PDF.extract_text_with_ocr(item["pdf_path"], row["HEADING"], row["PDF LINK"], log_file_path, target_date, between_pages=preempt)
+        return save_extracted(item, extracted_text)
+
+    def save_extracted(item, extracted_text):
+        row = item["row"]
+        pdf_link = row["PDF LINK"]
+        usable = TEXT_FROM_PDF.has_usable_text(extracted_text)
+        if item.get("pdf_path") and usable and not item["duplicate_of"]:
+            item["duplicate_of"] = deduplicator.check_body(row, extracted_text)
+
+        item["extracted"] = TEXT_FROM_PDF.build_extracted_row(row, extracted_text, target_date)
+        if pdf_link and usable:
+            extracted_texts[pdf_link] = item["extracted"]["Extracted Data"]
+        SHARED_STORE.append_rows(extracted_file, [item["extracted"]])
+        latency.record(item["tier"], PRIORITY.filing_latency(row))
+        return item
+
+    def match(item):
+        row = item["extracted"]
+        time_match = re.search(r'\d{2}:\d{2}:\d{2}', row["INSIDER"] or "")
+        row_time = time_match.group(0) if time_match else None
+
+        company_name = SCHEME_FILTER.match_announcement(row, company_names)
+        if company_name and item["duplicate_of"] in alerted_links:
+            print(f"Folding near-duplicate filing '{row['PDF LINK']}' into the alert for '{item['duplicate_of']}'.")
+        elif company_name:
+            output_file = SCHEME_FILTER.save_scheme_rows(output_dir, [{
+                'HEADING': row['HEADING'],
+                'PDF LINK': row['PDF LINK'],
+                'Time': row_time,
+                'Word': SCHEME_FILTER.KEYWORD,
+                'Date': scheme_date,
+            }])
+            alerted_links.add(row['PDF LINK'])
+
+            if company_name not in alerted_companies:
+                alerted_companies.add(company_name)
+                recent = SCHEME_FILTER.has_recent_announcement(previous_announcements_df, company_name)
+                if not recent and datetime.now().hour < 20:
+                    SCHEME_FILTER.notify_via_call(f"Keyword '{SCHEME_FILTER.KEYWORD}' found for {company_name} on {scheme_date}.")
+                else:
+                    print(f"Skipping call/SMS for {company_name} as it's after 8 PM or announcement is recent.")
+
+                SCHEME_FILTER.send_email_with_attachment(
+                    subject=f"Keyword Found: {SCHEME_FILTER.KEYWORD}",
+                    body=f"Data file for the keyword '{SCHEME_FILTER.KEYWORD}' is attached.",
+                    to_email=os.getenv('TO_EMAIL'),
+                    attachment_path=output_file
+                )
+                print(f"Alert for {company_name} raised {time.monotonic() - item['scraped_at']:.1f}s after scraping.")
+
+        SCHEME_FILTER.advance_last_processed_time(output_dir, scheme_date, row_time)
+
+    # Download, extract and OCR queues hand out the highest-priority item first.
+    download_queue = PRIORITY.PriorityQueue(STOP, maxsize=queue_size)
+    extract_queue = PRIORITY.PriorityQueue(STOP, maxsize=queue_size)
+    ocr_queue = PRIORITY.PriorityQueue(STOP, maxsize=queue_size)
+    match_queue = PRIORITY.PriorityQueue(STOP, maxsize=queue_size)
+    stages = [
+        start_stage("download", download, download_queue, extract_queue),
+        start_stage("extract", extract, extract_queue, match_queue, stop_queue=ocr_queue),
+        start_stage("ocr", ocr, ocr_queue, match_queue),
+        start_stage("match", match, match_queue),
+    ]
+
+    def enqueue(announcement):
+        score = PRIORITY.score_announcement(announcement, company_names)
+        download_queue.put({
+            "row": announcement,
+            "score": score,
+            "tier": PRIORITY.priority_tier(score),
+            "scraped_at": time.monotonic(),
+        })
+
+    all_announcements = []
+    try:
+        unfinished = unfinished_announcements(file_path, already_extracted)
+        if unfinished:
+            print(f"Requeueing {len(unfinished)} announcements left unfinished by an earlier run.")
+        for announcement in unfinished:
+            enqueue(announcement)
+
+        last_scraped_time = SCRAP_DATA.get_last_scraped_time(file_path)
+        for new_data in SCRAP_DATA.scrape_announcements(target_date, last_scraped_time):
+            all_announcements.extend(new_data)
+            for announcement in new_data:
+                enqueue(announcement)
+        SCRAP_DATA.save_announcements(file_path, target_date, all_announcements)
+    finally:
+        download_queue.put(STOP)
+        for stage in stages:
+            stage.join()
+
+    TEXT_FROM_PDF.print_ocr_stats()
+    latency.report(os.path.join(output_path, "Priority_latency_log.csv"))
+    print(f"Pipelined run finished for date: {target_date}")
+
+
+if __name__ == "__main__":
+    output_path = r"D:\Output\BSE DATA"
+    output_dir = r"D:\Output"
+    company_names_file = r"D:\CODES\BSE_AUTO\Companies_F&O.csv"
+    previous_announcements_file = r"D:\CODES\BSE_AUTO\last_announcements.csv"
+    queue_size = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+
+    company_names = SCHEME_FILTER.load_company_names(company_names_file)
+    if company_names is not None:
+        target_date = datetime.now().strftime("%d-%m-%Y")
+        run_pipeline(target_date, output_path, output_dir, company_names, previous_announcements_file, queue_size)
@@ -0,0 +1,135 @@
+import re
+import heapq
+import itertools
+import statistics
+import threading
+from datetime import datetime
+import SHARED_STORE
+import SCHEME_FILTER
+
+# Scores are computed from the scraped row alone, before the PDF is touched.
+FO_COMPANY_SCORE = 4
+KEYWORD_SCORE = 5
+CATEGORY_SCORES = {
+    "corp. action": 3,
+    "company update": 2,
+    "board meeting": 1,
+    "agm/egm": 1,
+    "result": 1,
+}
+HIGH_PRIORITY_SCORE = 7
+NORMAL_PRIORITY_SCORE = 3
+
+
+def score_announcement(row, company_names):
+    heading = str(row.get('HEADING') or '')
+    announcement = str(row.get('ANNOUNCEMENT') or '')
+    category = str(row.get('CATEGORY') or '').strip().lower()
+
+    score = CATEGORY_SCORES.get(category, 0)
+    if any(company_name.lower() in heading.lower() for company_name in company_names or []):
+        score += FO_COMPANY_SCORE
+    if re.search(SCHEME_FILTER.keywords_pattern, f"{heading} {announcement}", re.IGNORECASE):
+        score += KEYWORD_SCORE
+    return score
+
+
+def priority_tier(score):
+    if score >= HIGH_PRIORITY_SCORE:
+        return "high"
+    if score >= NORMAL_PRIORITY_SCORE:
+        return "normal"
+    return "low"
+
+
+def sort_by_priority(df, company_names):
+    # Highest score first; ties keep the oldest filing first so near-duplicate
+    # copies are still linked to the filing they repeat.
+    scores = df.apply(lambda row: score_announcement(row, company_names), axis=1) if not df.empty else []
+    df = df.assign(PRIORITY=scores).iloc[::-1]
+    return df.sort_values('PRIORITY', ascending=False, kind='stable')
+
+
+class PriorityQueue:
+    # Bounded, thread-safe max-priority queue of pipeline items. Each item
+    # carries its own "score"; the stop marker always comes out last.
+    def __init__(self, stop, maxsize=0):
+        self.stop = stop
+        self.maxsize = maxsize
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def _score(self, item):
+        return float("-inf") if item is self.stop else item["score"]
+
+    def put(self, item):
+        with self._condition:
+            self._condition.wait_for(lambda: not self.maxsize or len(self._heap) < self.maxsize)
+            heapq.heappush(self._heap, (-self._score(item), next(self._counter), item))
+            self._condition.notify_all()
+
+    def get(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._heap)
+            item = heapq.heappop(self._heap)[2]
+            self._condition.notify_all()
+            return item
+
+    def get_if_higher(self, score):
+        # Non-blocking: hands back a waiting item only if it outranks `score`.
+        with self._condition:
+            if self._heap and -self._heap[0][0] > score:
+                item = heapq.heappop(self._heap)[2]
+                self._condition.notify_all()
+                return item
+            return None
+
+
+def filing_latency(row, now=None):
+    # Seconds from the exchange's receipt time in INSIDER until now; None when
+    # the row carries no timestamp.
+    match = re.search(r'(\d{2}-\d{2}-\d{4} \d{2}:\d{2}:\d{2})', str(row.get('INSIDER') or ''))
+    if not match:
+        return None
+    filed_at = datetime.strptime(match.group(1), "%d-%m-%Y %H:%M:%S")
+    return max(((now or datetime.now()) - filed_at).total_seconds(), 0.0)
+
+
+class LatencyStats:
+    def __init__(self):
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, tier, seconds):
+        if seconds is None:
+            return
+        with self._lock:
+            self._latencies.setdefault(tier, []).append(seconds)
+
+    def summary(self):
+        rows = []
+        with self._lock:
+            for tier in ("high", "normal", "low"):
+                latencies = sorted(self._latencies.get(tier, []))
+                if not latencies:
+                    continue
+                rows.append({
+                    'TIER': tier,
+                    'COUNT': len(latencies),
+                    'MEDIAN SECONDS': round(statistics.median(latencies), 2),
+                    'P95 SECONDS': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+                    'MAX SECONDS': round(latencies[-1], 2),
+                })
+        return rows
+
+    def report(self, stats_file=None):
+        rows = self.summary()
+        for row in rows:
+            print(
+                f"Priority {row['TIER']}: {row['COUNT']} announcements, median {row['MEDIAN SECONDS']}s, "
+                f"p95 {row['P95 SECONDS']}s, max {row['MAX SECONDS']}s"
+            )
+        if stats_file and rows:
+            run_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            SHARED_STORE.append_rows(stats_file, [dict(row, **{'RUN AT': run_at}) for row in rows])
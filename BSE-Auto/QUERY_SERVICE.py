@@ -0,0 +1,277 @@
+import os
+import re
+import sys
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import SHARED_STORE
+
+SNIPPET_LENGTH = 300
+
+
+def parse_insider_time(insider):
+    match = re.search(r'(\d{2}-\d{2}-\d{4} \d{2}:\d{2}:\d{2})', insider or "")
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%d-%m-%Y %H:%M:%S")
+
+
+def parse_query_time(value, day):
+    # Accepts a full "YYYY-MM-DDTHH:MM[:SS]" timestamp or just "HH:MM[:SS]" on the indexed day.
+    # Announcement times are naive local times, so an offset is converted to local time.
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = None
+    if parsed is not None:
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    for time_format in ("%H:%M:%S", "%H:%M"):
+        try:
+            parsed = datetime.strptime(value, time_format).time()
+            return datetime.combine(day, parsed)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time '{value}'")
+
+
+def company_key(heading):
+    return (heading or "").split(" - ")[0].strip().lower()
+
+
+class AnnouncementIndex:
+    # Holds the hot day's announcements and alerts in memory. Writers add rows
+    # as they are tailed from the CSVs; readers query without touching disk.
+    def __init__(self, day, first_id=1):
+        self.day = day
+        self.next_id = first_id
+        self._condition = threading.Condition()
+        self._announcements = []
+        self._by_link = {}
+        self._by_company = defaultdict(list)
+        self._by_category = defaultdict(list)
+        self._alerts = []
+
+    def add_announcement(self, row):
+        extracted = row.get('Extracted Data') or ""
+        record = {
+            'HEADING': row.get('HEADING'),
+            'ANNOUNCEMENT': row.get('ANNOUNCEMENT'),
+            'INSIDER': row.get('INSIDER'),
+            'PDF LINK': row.get('PDF LINK'),
+            'CATEGORY': row.get('CATEGORY'),
+            'SNIPPET': extracted[:SNIPPET_LENGTH],
+            'TIME': parse_insider_time(row.get('INSIDER')),
+        }
+        with self._condition:
+            # A re-extracted announcement replaces its earlier entry
+            previous = self._by_link.get(record['PDF LINK']) if record['PDF LINK'] else None
+            if previous is not None:
+                previous.update(record)
+                return
+            if record['PDF LINK']:
+                self._by_link[record['PDF LINK']] = record
+            self._announcements.append(record)
+            self._by_company[company_key(record['HEADING'])].append(record)
+            self._by_category[(record['CATEGORY'] or "").lower()].append(record)
+
+    def add_alert(self, row):
+        with self._condition:
+            alert = dict(row)
+            alert['ID'] = self.next_id
+            self.next_id += 1
+            self._alerts.append(alert)
+            self._condition.notify_all()
+
+    def query(self, company=None, category=None, since=None, until=None, limit=None):
+        with self._condition:
+            if company and company.lower() in self._by_company:
+                candidates = self._by_company[company.lower()]
+            elif company:
+                candidates = [r for r in self._announcements if company.lower() in (r['HEADING'] or "").lower()]
+            elif category:
+                candidates = self._by_category.get(category.lower(), [])
+            else:
+                candidates = self._announcements
+
+            results = []
+            for record in candidates:
+                if category and (record['CATEGORY'] or "").lower() != category.lower():
+                    continue
+                if since and (record['TIME'] is None or record['TIME'] < since):
+                    continue
+                if until and (record['TIME'] is None or record['TIME'] > until):
+                    continue
+                results.append(dict(record))
+
+        results.sort(key=lambda r: r['TIME'] or datetime.min, reverse=True)
+        return results[:limit] if limit else results
+
+    def alerts_after(self, after_id, timeout=0):
+        # Long-poll: blocks until an alert newer than `after_id` exists or the timeout expires.
+        with self._condition:
+            self._condition.wait_for(lambda: any(alert['ID'] > after_id for alert in self._alerts), timeout=timeout)
+            return [dict(alert) for alert in self._alerts if alert['ID'] > after_id]
+
+    def stats(self):
+        with self._condition:
+            return {
+                'day': self.day.isoformat(),
+                'announcements': len(self._announcements),
+                'companies': len(self._by_company),
+                'alerts': len(self._alerts),
+            }
+
+
+class CsvTail:
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        self.offset = 0
+        self.fieldnames = None
+
+    def read_new_rows(self):
+        if not os.path.isfile(self.csv_file):
+            return []
+        if os.path.getsize(self.csv_file) < self.offset:
+            # The file was replaced; start over from its header
+            self.offset, self.fieldnames = 0, None
+        self.fieldnames, rows, self.offset = SHARED_STORE.read_new_rows(self.csv_file, self.offset, self.fieldnames)
+        return rows
+
+
+class IndexUpdater(threading.Thread):
+    # Tails the day's extracted CSV and the scheme of arrangement file and
+    # feeds only the newly appended rows into the index.
+    def __init__(self, input_root_dir, output_dir, poll_interval=2):
+        super().__init__(name="index-updater", daemon=True)
+        self.input_root_dir = input_root_dir
+        self.output_dir = output_dir
+        self.poll_interval = poll_interval
+        self.index = None
+        self._stopped = threading.Event()
+        self._reset(datetime.now().date())
+
+    def _reset(self, day):
+        day_folder = os.path.join(self.input_root_dir, day.strftime('%Y'), day.strftime('%m'), day.strftime('%d'))
+        date_str = day.strftime('%d%m%Y')
+        # Alert IDs carry on from the previous day, so a client polling with
+        # after=<id> does not miss the new day's first alerts
+        self.index = AnnouncementIndex(day, self.index.next_id if self.index else 1)
+        self.announcements_tail = CsvTail(os.path.join(day_folder, f"{date_str}_{date_str}_extracted.csv"))
+        self.alerts_tail = CsvTail(os.path.join(self.output_dir, "SCHEME_OF_ARRANGEMENT", "scheme_of_arrangement.csv"))
+
+    def poll(self):
+        today = datetime.now().date()
+        if today != self.index.day:
+            self._reset(today)
+
+        for row in self.announcements_tail.read_new_rows():
+            self.index.add_announcement(row)
+        for row in self.alerts_tail.read_new_rows():
+            if row.get('Date') == today.isoformat():
+                self.index.add_alert(row)
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error updating announcement index: {e}")
+            self._stopped.wait(self.poll_interval)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def to_json(records):
+    return json.dumps(records, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value))
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    updater = None
+
+    def send_json(self, payload, status=200):
+        body = to_json(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        index = self.updater.index
+        try:
+            if url.path == '/announcements':
+                self.send_json(index.query(
+                    company=params.get('company'),
+                    category=params.get('category'),
+                    since=parse_query_time(params.get('since'), index.day),
+                    until=parse_query_time(params.get('until'), index.day),
+                    limit=int(params['limit']) if 'limit' in params else None,
+                ))
+            elif url.path == '/alerts':
+                after_id = int(params.get('after', 0))
+                timeout = min(float(params.get('timeout', 0)), 60)
+                self.send_json(index.alerts_after(after_id, timeout))
+            elif url.path == '/alerts/stream':
+                self.stream_alerts(int(params.get('after', 0)))
+            elif url.path == '/stats':
+                self.send_json(index.stats())
+            else:
+                self.send_json({'error': f"Unknown path '{url.path}'"}, status=404)
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+
+    def stream_alerts(self, after_id):
+        # Server-sent events: one event per new alert, with a comment line as keep-alive.
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            while True:
+                alerts = self.updater.index.alerts_after(after_id, timeout=15)
+                if not alerts:
+                    self.wfile.write(b": keep-alive\n\n")
+                for alert in alerts:
+                    self.wfile.write(f"id: {alert['ID']}\ndata: {to_json(alert)}\n\n".encode('utf-8'))
+                    after_id = alert['ID']
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(input_root_dir, output_dir, host="127.0.0.1", port=8765, poll_interval=2):
+    updater = IndexUpdater(input_root_dir, output_dir, poll_interval)
+    updater.poll()
+    updater.start()
+
+    QueryHandler.updater = updater
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.daemon_threads = True
+    print(f"Serving announcements on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        updater.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    input_root_dir = r"D:\Output\BSE DATA"
+    output_dir = r"D:\Output"
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    serve(input_root_dir, output_dir, port=port)
@@ -1,18 +1,16 @@
 
 import os
-import pandas as pd
 import re
 import warnings
-import smtplib
 from datetime import datetime, timedelta
-from twilio.rest import Client
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+from LAZY_IMPORT import lazy_import
+import SHARED_STORE
+import DEDUP
 
-warnings.filterwarnings("ignore")
-current_time = datetime.now().time()
+pd = lazy_import("pandas")
+
+KEYWORD = 'Scheme Of Arrangement'
+keywords_pattern = r'(Scheme Of Arrangement)'
 
 # Function to read last processed time
 def read_last_processed_time(output_dir, target_date):
@@ -30,8 +28,68 @@ def update_last_processed_time(output_dir, target_date, last_time):
     with open(tracking_file, 'w') as file:
         file.write(last_time if last_time else "No valid last time found")
 
+# Function to advance the last processed time, never moving it backwards
+def advance_last_processed_time(output_dir, target_date, last_time):
+    previous_time = read_last_processed_time(output_dir, target_date)
+    if last_time and (not previous_time or last_time > previous_time):
+        update_last_processed_time(output_dir, target_date, last_time)
+
+# Function to read the watched F&O companies
+def load_company_names(company_names_file):
+    company_names_df = pd.read_csv(company_names_file)
+    if 'Companies' not in company_names_df.columns:
+        print("Column 'Companies' not found in the CSV file.")
+        return None
+    return company_names_df['Companies'].tolist()
+
+# Function to load announcements already notified for each company
+def load_previous_announcements(previous_announcements_file):
+    previous_announcements_df = pd.read_csv(previous_announcements_file)
+    previous_announcements_df['Date'] = pd.to_datetime(previous_announcements_df['Date'])
+    previous_announcements_df['Company'] = previous_announcements_df['Company'].str.lower()
+    return previous_announcements_df
+
+def has_recent_announcement(previous_announcements_df, company_name):
+    six_months_ago = datetime.now() - timedelta(days=180)
+    recent_entry = previous_announcements_df[
+        (previous_announcements_df['Company'] == company_name) & 
+        (previous_announcements_df['Date'] >= six_months_ago)
+    ]
+    return not recent_entry.empty
+
+# Function to match a single extracted announcement against the watched companies
+def match_announcement(row, company_names):
+    heading = str(row.get('HEADING') or '')
+    texts = [heading, str(row.get('ANNOUNCEMENT') or ''), str(row.get('Extracted Data') or '')]
+    if not any(re.search(keywords_pattern, text, re.IGNORECASE) for text in texts):
+        return None
+    for company_name in company_names:
+        if company_name.lower() in heading.lower():
+            return company_name
+    return None
+
+def scheme_csv_path(output_dir):
+    return os.path.join(output_dir, "SCHEME_OF_ARRANGEMENT", "scheme_of_arrangement.csv")
+
+# Function to append matched announcements to the scheme of arrangement file
+def save_scheme_rows(output_dir, rows):
+    output_file = scheme_csv_path(output_dir)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    SHARED_STORE.append_rows(output_file, rows)
+    return output_file
+
+# Function to read the PDF links that already raised an alert
+def load_alerted_links(output_dir):
+    output_file = scheme_csv_path(output_dir)
+    if not os.path.isfile(output_file):
+        return set()
+    _, rows, _ = SHARED_STORE.read_new_rows(output_file)
+    return {row['PDF LINK'] for row in rows if row.get('PDF LINK')}
+
 # Function to make a call via Twilio
 def notify_via_call(message):
+    from twilio.rest import Client
+
     account_sid = os.getenv('ACCOUNT_SID')
     auth_token = os.getenv('AUTH_TOKEN')
     from_phone = os.getenv('FROM_PHONE')
@@ -47,6 +105,12 @@ def notify_via_call(message):
 
 # Function to send email with attachment
 def send_email_with_attachment(subject, body, to_email, attachment_path):
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.mime.base import MIMEBase
+    from email import encoders
+
     from_email = os.getenv('SENDER_EMAIL')
     from_password = os.getenv('EMAIL_APP_PASSWORD')
 
@@ -72,9 +136,9 @@ def send_email_with_attachment(subject, body, to_email, attachment_path):
     print("Email sent successfully.")
 
 def search_in_specific_csv(input_root_dir, output_dir, company_names, target_date, previous_announcements_file):
+    current_time = datetime.now().time()
     extracted_data = []
     extracted_file_pattern = re.compile(r'^\d{8}_\d{8}_extracted\.csv$')
-    keywords_pattern = r'(Scheme Of Arrangement)'
 
     try:
         year_folder, month_folder, day_folder = target_date.split('-')
@@ -105,7 +169,7 @@ def search_in_specific_csv(input_root_dir, output_dir, company_names, target_dat
             print(f"The file '{csv_file_path}' is empty.")
             return  
 
-        df = pd.read_csv(csv_file_path)
+        df = SHARED_STORE.read_csv(csv_file_path)
 
         if 'HEADING' not in df.columns or 'ANNOUNCEMENT' not in df.columns or 'Extracted Data' not in df.columns:
             print(f"The required columns are missing in '{csv_file_path}'.")
@@ -124,10 +188,17 @@ def search_in_specific_csv(input_root_dir, output_dir, company_names, target_dat
         highest_time_in_batch = df['Extracted Time'].iloc[0]
         update_last_processed_time(output_dir, target_date, highest_time_in_batch)
 
-        previous_announcements_df = pd.read_csv(previous_announcements_file)
-        previous_announcements_df['Date'] = pd.to_datetime(previous_announcements_df['Date'])
-        six_months_ago = datetime.now() - timedelta(days=180)
-        previous_announcements_df['Company'] = previous_announcements_df['Company'].str.lower()
+        # Near-duplicates are folded only into an original that raised an
+        # alert, earlier or in this batch
+        deduplicator = DEDUP.AnnouncementDeduplicator(DEDUP.fingerprint_path(date_path), keywords_pattern)
+        alerted_links = load_alerted_links(output_dir)
+        alerted_links.update(row['PDF LINK'] for _, row in df.iterrows() if match_announcement(row, company_names))
+        duplicates = df.apply(lambda row: deduplicator.original_of(row) in alerted_links, axis=1)
+        if duplicates.any():
+            print(f"Folding {int(duplicates.sum())} near-duplicate filings into their original announcements.")
+            df = df[~duplicates]
+
+        previous_announcements_df = load_previous_announcements(previous_announcements_file)
 
         for company_name in company_names:
             
@@ -143,30 +214,18 @@ def search_in_specific_csv(input_root_dir, output_dir, company_names, target_dat
             if not filtered_df.empty:
                 filtered_df['Time'] = filtered_df['INSIDER'].str.extract(r'(\d{2}:\d{2}:\d{2})', expand=False)
                 final_df = filtered_df[['HEADING', 'PDF LINK', 'Time']].copy()
-                final_df['Word'] = 'Scheme Of Arrangement'
+                final_df['Word'] = KEYWORD
                 final_df['Date'] = target_date
                 extracted_data.append(final_df)
 
-                recent_entry = previous_announcements_df[
-                    (previous_announcements_df['Company'] == company_name) & 
-                    (previous_announcements_df['Date'] >= six_months_ago)
-                ]
-
-                if recent_entry.empty and current_time.hour < 20:
+                if not has_recent_announcement(previous_announcements_df, company_name) and current_time.hour < 20:
                     notify_via_call(f"Keyword 'Scheme Of Arrangement' found for {company_name} on {target_date}.")
                 else:
                     print(f"Skipping call/SMS for {company_name} as it's after 8 PM or announcement is recent.")
 
         if extracted_data:
             combined_df = pd.concat(extracted_data, ignore_index=True)
-            scheme_dir = os.path.join(output_dir, "SCHEME_OF_ARRANGEMENT")
-            os.makedirs(scheme_dir, exist_ok=True)
-            output_file = os.path.join(scheme_dir, "scheme_of_arrangement.csv")
-
-            if os.path.exists(output_file):
-                combined_df.to_csv(output_file, mode='a', header=False, index=False)
-            else:
-                combined_df.to_csv(output_file, index=False)
+            output_file = save_scheme_rows(output_dir, combined_df.fillna('').to_dict('records'))
 
             print(f"Data successfully extracted and saved to '{output_file}'.")
 
@@ -185,17 +244,20 @@ def search_in_specific_csv(input_root_dir, output_dir, company_names, target_dat
     except Exception as e:
         print(f"Error processing file {csv_file_path}: {e}")
 
-# Paths and execution
-input_root_dir = r"D:\Output\BSE DATA"
-output_dir = r"D:\Output"
-company_names_file = r"D:\CODES\BSE_AUTO\Companies_F&O.csv"
-previous_announcements_file = r"D:\CODES\BSE_AUTO\last_announcements.csv"
+def main():
+    warnings.filterwarnings("ignore")
+
+    # Paths and execution
+    input_root_dir = r"D:\Output\BSE DATA"
+    output_dir = r"D:\Output"
+    company_names_file = r"D:\CODES\BSE_AUTO\Companies_F&O.csv"
+    previous_announcements_file = r"D:\CODES\BSE_AUTO\last_announcements.csv"
+
+    company_names = load_company_names(company_names_file)
 
-company_names_df = pd.read_csv(company_names_file)
+    if company_names is not None:
+        target_date = datetime.today().strftime('%Y-%m-%d')
+        search_in_specific_csv(input_root_dir, output_dir, company_names, target_date, previous_announcements_file)
 
-if 'Companies' in company_names_df.columns:
-    company_names = company_names_df['Companies'].tolist()
-    target_date = datetime.today().strftime('%Y-%m-%d')
-    search_in_specific_csv(input_root_dir, output_dir, company_names, target_date, previous_announcements_file)
-else:
-    print("Column 'Companies' not found in the CSV file.")
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,20 @@
 import os
 import time
-import pandas as pd
-import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException
 from datetime import datetime, timedelta
+from LAZY_IMPORT import lazy_import
+import SHARED_STORE
+import PRIORITY
+import SCHEME_FILTER
+
+pd = lazy_import("pandas")
+requests = lazy_import("requests")
 
 
 def init_webdriver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
     service = Service(ChromeDriverManager().install())
     options = webdriver.ChromeOptions()
     options.add_argument("--headless")
@@ -21,6 +22,10 @@ def init_webdriver():
 
 
 def select_date(driver, input_element, date):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     input_element.click()
     day, month, year = date.split("-")
     year_dropdown = WebDriverWait(driver, 20).until(
@@ -46,6 +51,8 @@ def select_date(driver, input_element, date):
 
 
 def scrape_page(driver):
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(driver.page_source, "html.parser")
     announcements = []
     rows = soup.select('table[ng-repeat="cann in CorpannData.Table"]')
@@ -88,6 +95,10 @@ def scrape_page(driver):
 
 
 def handle_alert(driver):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
     try:
         WebDriverWait(driver, 6).until(EC.alert_is_present())
         alert = driver.switch_to.alert
@@ -123,7 +134,7 @@ def sanitize_filename(name, keep_spaces=False):
 def get_last_scraped_time(file_path):
     try:
         if os.path.exists(file_path):
-            df = pd.read_csv(file_path)
+            df = SHARED_STORE.read_csv(file_path)
             if not df.empty:
 
                 last_time_str = df["INSIDER"].dropna().str.strip().max()
@@ -138,90 +149,106 @@ def get_last_scraped_time(file_path):
         print(f"Error reading last scraped time: {e}")
     return None
 
-def scrape_data(target_date, output_path):
-    print(f"Starting scrape for date: {target_date}")
-
+def announcement_csv_path(output_path, target_date):
     day_folder = create_folder_structure(output_path, target_date)
     date_str = target_date.replace("-", "")
     file_name = f"{date_str}_{date_str}.csv"
-    file_path = os.path.join(day_folder, file_name)
+    return os.path.join(day_folder, file_name)
 
-    last_scraped_time = get_last_scraped_time(file_path)
-
-    driver = init_webdriver()
-    driver.get("https://www.bseindia.com/corporates/ann.html")
-    time.sleep(5)
 
-    from_date_input = driver.find_element(By.ID, "txtFromDt")
-    to_date_input = driver.find_element(By.ID, "txtToDt")
+def scrape_announcements(target_date, last_scraped_time):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
 
+    driver = init_webdriver()
     try:
-        select_date(driver, from_date_input, target_date)
-        select_date(driver, to_date_input, target_date)
-    except TimeoutException as e:
-        print(f"Timeout error selecting date: {target_date}. Skipping this date.")
-        driver.quit()
-        return
-
-    search_button = WebDriverWait(driver, 20).until(
-        EC.element_to_be_clickable((By.ID, "btnSubmit"))
-    )
-    driver.execute_script("arguments[0].scrollIntoView();", search_button)
-    time.sleep(1)  # Optional sleep
-    search_button.click()
+        driver.get("https://www.bseindia.com/corporates/ann.html")
+        time.sleep(5)
 
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "tr")))
-
-    all_announcements = []
-    page = 1
-    while True:
-        new_data = scrape_page(driver)
-        if last_scraped_time:
-
-            new_data = [
-                item
-                for item in new_data
-                if "INSIDER" in item
-                and len(item["INSIDER"].split()) >= 2
-                and datetime.strptime(
-                    item["INSIDER"].split()[0] + " " + item["INSIDER"].split()[1],
-                    "%d-%m-%Y %H:%M:%S",
-                )
-                > last_scraped_time
-            ]
-
-        all_announcements.extend(new_data)
-        print(f"Scraping page {page} for date: {target_date}")
-
-        if not new_data:
-            break
+        from_date_input = driver.find_element(By.ID, "txtFromDt")
+        to_date_input = driver.find_element(By.ID, "txtToDt")
 
         try:
-            next_button = driver.find_element(By.ID, "idnext")
-            if "disabled" in next_button.get_attribute("class"):
+            select_date(driver, from_date_input, target_date)
+            select_date(driver, to_date_input, target_date)
+        except TimeoutException as e:
+            print(f"Timeout error selecting date: {target_date}. Skipping this date.")
+            return
+
+        search_button = WebDriverWait(driver, 20).until(
+            EC.element_to_be_clickable((By.ID, "btnSubmit"))
+        )
+        driver.execute_script("arguments[0].scrollIntoView();", search_button)
+        time.sleep(1)  # Optional sleep
+        search_button.click()
+
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "tr")))
+
+        page = 1
+        while True:
+            new_data = scrape_page(driver)
+            if last_scraped_time:
+
+                new_data = [
+                    item
+                    for item in new_data
+                    if "INSIDER" in item
+                    and len(item["INSIDER"].split()) >= 2
+                    and datetime.strptime(
+                        item["INSIDER"].split()[0] + " " + item["INSIDER"].split()[1],
+                        "%d-%m-%Y %H:%M:%S",
+                    )
+                    > last_scraped_time
+                ]
+
+            print(f"Scraping page {page} for date: {target_date}")
+
+            if not new_data:
                 break
-            next_button.click()
-            time.sleep(7)
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            break
-        page += 1
 
-    if all_announcements:
-        new_data_df = pd.DataFrame(all_announcements)
-        if os.path.exists(file_path):
+            yield new_data
+
+            try:
+                next_button = driver.find_element(By.ID, "idnext")
+                if "disabled" in next_button.get_attribute("class"):
+                    break
+                next_button.click()
+                time.sleep(7)
+            except Exception as e:
+                print(f"An error occurred: {e}")
+                break
+            page += 1
+    finally:
+        driver.quit()
 
-            existing_data_df = pd.read_csv(file_path)
-            combined_df = pd.concat([new_data_df, existing_data_df], ignore_index=True)
-            combined_df.to_csv(file_path, index=False)
-        else:
 
-            new_data_df.to_csv(file_path, index=False)
+def save_announcements(file_path, target_date, all_announcements):
+    if all_announcements:
+        SHARED_STORE.prepend_rows(file_path, all_announcements)
         print(f"Data for date: {target_date} has been saved to '{file_path}'")
     else:
         print(f"No new data found for date: {target_date}")
 
-    driver.quit()
+
+def scrape_data(target_date, output_path):
+    print(f"Starting scrape for date: {target_date}")
+
+    file_path = announcement_csv_path(output_path, target_date)
+    last_scraped_time = get_last_scraped_time(file_path)
+
+    all_announcements = []
+    for new_data in scrape_announcements(target_date, last_scraped_time):
+        all_announcements.extend(new_data)
+
+    save_announcements(file_path, target_date, all_announcements)
+
+
+def pdf_file_name(pdf_url, heading, category):
+    first_word = sanitize_filename(heading.split("-")[0])
+    category_sanitized = sanitize_filename(category, keep_spaces=True)
+    return f"{first_word}_{category_sanitized}_{os.path.basename(pdf_url)}"
 
 
 def download_pdf(pdf_url, download_folder, heading, category):
@@ -230,20 +257,19 @@ def download_pdf(pdf_url, download_folder, heading, category):
     }
     response = requests.get(pdf_url, headers=headers)
     if response.status_code == 200:
-        first_word = sanitize_filename(heading.split("-")[0])
-        category_sanitized = sanitize_filename(category, keep_spaces=True)
-        pdf_name = f"{first_word}_{category_sanitized}_{os.path.basename(pdf_url)}"
-        pdf_path = os.path.join(download_folder, pdf_name)
+        pdf_path = os.path.join(download_folder, pdf_file_name(pdf_url, heading, category))
         with open(pdf_path, "wb") as f:
             f.write(response.content)
         # print(f"Downloaded PDF: {pdf_path}")
+        return pdf_path
     else:
         print(
             f"Failed to fetch PDF from URL: {pdf_url} with status code: {response.status_code}"
         )
+        return None
 
 
-def download_pdfs(output_path, target_date):
+def download_pdfs(output_path, target_date, company_names=None):
 
     day, month, year = target_date.split("-")
     pdf_folder_path = os.path.join(output_path, year, month, day, "PDFs")
@@ -258,15 +284,16 @@ def download_pdfs(output_path, target_date):
         return
 
     try:
-        df = pd.read_csv(csv_file_path)
+        df = SHARED_STORE.read_csv(csv_file_path)
     except pd.errors.EmptyDataError:
         print(f"CSV file {csv_file_path} is improperly formatted or empty. Skipping.")
         return
 
-    pdf_links = df[["PDF LINK", "HEADING", "CATEGORY"]].dropna()
+    pdf_links = df.dropna(subset=["PDF LINK", "HEADING", "CATEGORY"])
     print(f"Downloading PDFs for date: {target_date}")
 
-    for _, row in pdf_links.iterrows():
+    # Alert-relevant filings first; ties go oldest first
+    for _, row in PRIORITY.sort_by_priority(pdf_links, company_names).iterrows():
 
         pdf_name = f"{sanitize_filename(row['HEADING'].split()[0])}_{sanitize_filename(row['CATEGORY'], keep_spaces=True)}_{os.path.basename(row['PDF LINK'])}"
 
@@ -279,9 +306,10 @@ def download_pdfs(output_path, target_date):
 
 if __name__ == "__main__":
     output_path = r"D:\Output\BSE DATA"
+    company_names_file = r"D:\CODES\BSE_AUTO\Companies_F&O.csv"
 
     yesterday = datetime.now() - timedelta(days=9)
     target_date = yesterday.strftime("%d-%m-%Y")
 
     scrape_data(target_date, output_path)
-    download_pdfs(output_path, target_date)
+    download_pdfs(output_path, target_date, SCHEME_FILTER.load_company_names(company_names_file))
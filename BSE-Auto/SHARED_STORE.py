@@ -0,0 +1,119 @@
+import os
+import io
+import csv
+import time
+from contextlib import contextmanager
+from LAZY_IMPORT import lazy_import
+
+pd = lazy_import("pandas")
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _try_lock(lock_file):
+    try:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(lock_file):
+    if os.name == "nt":
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def locked(csv_file, timeout=60):
+    # Writers and readers of a shared CSV take the same sidecar lock, so a
+    # reader never sees a row that is only half written.
+    lock_path = csv_file + ".lock"
+    with open(lock_path, "a+b") as lock_file:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(lock_file):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for lock on '{csv_file}'")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            _unlock(lock_file)
+
+
+def _read_header(csv_file):
+    with open(csv_file, newline='', encoding='utf-8') as csvfile:
+        return next(csv.reader(csvfile), None)
+
+
+def append_rows(csv_file, rows):
+    # Append-only log: every batch is serialised up front and written with a
+    # single write + fsync while holding the lock.
+    if not rows:
+        return
+    with locked(csv_file):
+        file_exists = os.path.isfile(csv_file) and os.stat(csv_file).st_size > 0
+        fieldnames = _read_header(csv_file) if file_exists else None
+        if not fieldnames:
+            fieldnames = list(rows[0].keys())
+            file_exists = False
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+        if not file_exists:
+            writer.writeheader()
+        writer.writerows(rows)
+
+        with open(csv_file, mode='a', newline='', encoding='utf-8') as csvfile:
+            csvfile.write(buffer.getvalue())
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+
+
+def read_bytes(csv_file):
+    with locked(csv_file):
+        with open(csv_file, 'rb') as csvfile:
+            return csvfile.read()
+
+
+def read_new_rows(csv_file, offset=0, fieldnames=None):
+    # Reads only what was appended since `offset`. Appends are whole rows
+    # written under the lock, so the tail never ends mid-row.
+    with locked(csv_file):
+        with open(csv_file, 'rb') as csvfile:
+            csvfile.seek(offset)
+            data = csvfile.read()
+    if not data:
+        return fieldnames, [], offset
+    reader = csv.DictReader(io.StringIO(data.decode('utf-8'), newline=''), fieldnames=fieldnames)
+    rows = list(reader)
+    return reader.fieldnames, rows, offset + len(data)
+
+
+def read_csv(csv_file, **kwargs):
+    # Takes a consistent snapshot under the lock, then parses it outside.
+    return pd.read_csv(io.BytesIO(read_bytes(csv_file)), **kwargs)
+
+
+def prepend_rows(csv_file, rows):
+    # Newest rows go first. The file is rewritten to a temporary copy and
+    # swapped in atomically, so readers see either the old or the new file.
+    if not rows:
+        return
+    with locked(csv_file):
+        new_df = pd.DataFrame(rows)
+        if os.path.exists(csv_file):
+            existing_df = pd.read_csv(csv_file)
+            new_df = pd.concat([new_df, existing_df], ignore_index=True)
+        temp_file = csv_file + ".tmp"
+        new_df.to_csv(temp_file, index=False)
+        os.replace(temp_file, csv_file)
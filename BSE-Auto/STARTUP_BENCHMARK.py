@@ -0,0 +1,82 @@
+import os
+import sys
+import csv
+import time
+import subprocess
+import statistics
+from datetime import datetime
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy dependencies each script used to import at module top.
+SCRIPTS = {
+    "SCRAP_DATA": ["pandas", "requests", "selenium.webdriver", "bs4", "webdriver_manager.chrome"],
+    "TEXT_FROM_PDF": ["pandas", "fitz", "ocrmypdf"],
+    "SCHEME_FILTER": ["pandas", "twilio.rest", "smtplib", "email.mime.multipart"],
+    "BSE_AUTO": ["schedule"],
+}
+
+
+def time_interpreter(code, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=script_dir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            error_lines = result.stderr.decode(errors="ignore").strip().splitlines()
+            return None, error_lines[-1] if error_lines else f"exit code {result.returncode}"
+        timings.append(elapsed)
+    return statistics.median(timings), None
+
+
+def record_results(results_file, rows):
+    file_exists = os.path.isfile(results_file)
+    with open(results_file, mode='a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=rows[0].keys())
+        if not file_exists:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_benchmark(runs=5, results_file=None):
+    baseline, _ = time_interpreter("pass", runs)
+    print(f"Bare interpreter start: {baseline * 1000:.1f} ms (median of {runs})")
+
+    rows = []
+    run_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for script, dependencies in SCRIPTS.items():
+        cold_start, error = time_interpreter(f"import {script}", runs)
+        if cold_start is None:
+            print(f"{script}: import failed ({error})")
+            continue
+
+        eager, error = time_interpreter(f"import {script}, " + ", ".join(dependencies), runs)
+        eager_text = f"{(eager - baseline) * 1000:.1f} ms" if eager is not None else f"n/a ({error})"
+
+        print(
+            f"{script}: cold start {(cold_start - baseline) * 1000:.1f} ms over bare interpreter, "
+            f"with all dependencies loaded {eager_text}"
+        )
+        rows.append({
+            "RUN AT": run_at,
+            "SCRIPT": script,
+            "COLD START MS": round((cold_start - baseline) * 1000, 1),
+            "EAGER MS": round((eager - baseline) * 1000, 1) if eager is not None else "",
+            "RUNS": runs,
+        })
+
+    if results_file and rows:
+        record_results(results_file, rows)
+        print(f"Startup times appended to '{results_file}'.")
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results_file = sys.argv[2] if len(sys.argv) > 2 else os.path.join(script_dir, "startup_times.csv")
+    run_benchmark(runs, results_file)
@@ -1,10 +1,31 @@
 import os
-import pandas as pd
-import fitz  # PyMuPDF
 import re
-import ocrmypdf
 import csv
+import time
+import threading
 from datetime import datetime, timedelta
+from LAZY_IMPORT import lazy_import
+import SHARED_STORE
+import DEDUP
+import PRIORITY
+import SCHEME_FILTER
+
+pd = lazy_import("pandas")
+fitz = lazy_import("fitz")  # PyMuPDF
+ocrmypdf = lazy_import("ocrmypdf")
+
+# PyMuPDF is not thread-safe; every call into it goes through this lock so the
+# pipeline's extract and OCR stages never use it at the same time.
+fitz_lock = threading.RLock()
+
+# Tiered OCR: every scanned page first gets a cheap low-resolution pass without
+# deskew; only pages whose text looks like OCR noise are escalated.
+FAST_OCR_DPI = 150
+WORD_RATIO_THRESHOLD = 0.6
+WORD_PATTERN = re.compile(r"^([A-Z]?[a-z]+|[A-Z]+|\d[\d,./:-]*|[&@%-])$")
+
+ocr_stats = {"documents": 0, "pages": 0, "escalated_pages": 0, "fast_seconds": 0.0, "full_seconds": 0.0}
+ocr_stats_lock = threading.Lock()
 
 def sanitize_filename(name, keep_spaces=False):
     if keep_spaces:
@@ -18,11 +39,118 @@ def ocr_pdf(input_pdf, output_pdf):
     except Exception as e:
         print(f"Error performing OCR on PDF: {e}")
 
+def word_quality_ratio(text):
+    # Share of tokens that look like real words or numbers. Garbled OCR output
+    # is full of mixed symbols, odd casing and vowel-less letter runs.
+    tokens = [token.strip('.,;:()[]"\'') for token in text.split()]
+    tokens = [token for token in tokens if token]
+    if not tokens:
+        return 0.0
+    good = 0
+    for token in tokens:
+        if not WORD_PATTERN.match(token):
+            continue
+        if token.isalpha() and len(token) > 3 and not re.search(r'[aeiouyAEIOUY]', token):
+            continue
+        good += 1
+    return good / len(tokens)
+
+def ocr_pdf_tiered(input_pdf, output_pdf, stats_file=None, fast_dpi=FAST_OCR_DPI, threshold=WORD_RATIO_THRESHOLD, between_pages=None):
+    # The fast tier's time is the sum of its pages' OCR; lock waits and work
+    # run by between_pages are left out.
+    fast_seconds = 0.0
+    page_texts = []
+    escalate = []
+    try:
+        with fitz_lock:
+            pdf_document = fitz.open(input_pdf)
+            page_count = pdf_document.page_count
+    except Exception as e:
+        print(f"Error opening PDF for OCR: {e}")
+        return ''
+    try:
+        for number in range(page_count):
+            text, seconds = fast_ocr_page(pdf_document, number, fast_dpi)
+            fast_seconds += seconds
+            page_texts.append(text)
+            if word_quality_ratio(text) < threshold:
+                escalate.append(number)
+            if between_pages:
+                # Lets the caller run more urgent work between pages; the
+                # lock is not held here
+                between_pages()
+    finally:
+        with fitz_lock:
+            pdf_document.close()
+
+    start = time.perf_counter()
+    if escalate:
+        pages = ",".join(str(number + 1) for number in escalate)
+        try:
+            ocrmypdf.ocr(input_pdf, output_pdf, deskew=True, force_ocr=True, pages=pages)
+            with fitz_lock, fitz.open(output_pdf) as ocr_document:
+                for number in escalate:
+                    full_text = ocr_document[number].get_text()
+                    if word_quality_ratio(full_text) >= word_quality_ratio(page_texts[number]):
+                        page_texts[number] = full_text
+        except Exception as e:
+            print(f"Error performing OCR on PDF: {e}")
+    full_seconds = time.perf_counter() - start
+
+    record_ocr_stats(stats_file, input_pdf, len(page_texts), len(escalate), fast_seconds, full_seconds)
+    return ''.join(page_texts)
+
+def fast_ocr_page(pdf_document, number, fast_dpi):
+    # Returns the page text and the seconds spent on it once the lock is held
+    with fitz_lock:
+        start = time.perf_counter()
+        try:
+            page = pdf_document[number]
+            textpage = page.get_textpage_ocr(dpi=fast_dpi, full=True)
+            text = page.get_text(textpage=textpage)
+        except Exception as e:
+            print(f"Error performing fast OCR on page {number + 1} of PDF: {e}")
+            text = ''
+        return text, time.perf_counter() - start
+
+def record_ocr_stats(stats_file, pdf_path, pages, escalated_pages, fast_seconds, full_seconds):
+    with ocr_stats_lock:
+        ocr_stats["documents"] += 1
+        ocr_stats["pages"] += pages
+        ocr_stats["escalated_pages"] += escalated_pages
+        ocr_stats["fast_seconds"] += fast_seconds
+        ocr_stats["full_seconds"] += full_seconds
+
+    if stats_file:
+        SHARED_STORE.append_rows(stats_file, [{
+            'PDF': os.path.basename(pdf_path),
+            'PAGES': pages,
+            'ESCALATED PAGES': escalated_pages,
+            'FAST SECONDS': round(fast_seconds, 2),
+            'FULL SECONDS': round(full_seconds, 2),
+            'TIME': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }])
+
+def print_ocr_stats():
+    with ocr_stats_lock:
+        if not ocr_stats["documents"]:
+            return
+        escalation_rate = ocr_stats["escalated_pages"] / max(ocr_stats["pages"], 1)
+        print(
+            f"OCR: {ocr_stats['documents']} documents, {ocr_stats['pages']} pages, "
+            f"{escalation_rate:.0%} escalated. Fast tier {ocr_stats['fast_seconds']:.1f}s, "
+            f"full tier {ocr_stats['full_seconds']:.1f}s."
+        )
+
+def ocr_stats_path(log_file_path):
+    return os.path.join(os.path.dirname(log_file_path), "OCR_stats_log.csv")
+
 def extract_text_from_pdf(file_path):
     try:
-        pdf_document = fitz.open(file_path)
-        text = ''.join([page.get_text() for page in pdf_document])
-        pdf_document.close()
+        with fitz_lock:
+            pdf_document = fitz.open(file_path)
+            text = ''.join([page.get_text() for page in pdf_document])
+            pdf_document.close()
         return text
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
@@ -39,14 +167,12 @@ def extract_date_from_folder(year_folder, month_folder, date_folder):
         print(f"Error extracting date from folder names: {e}")
         return ""
 
+def extracted_csv_path(csv_file):
+    return os.path.splitext(csv_file)[0] + '_extracted.csv'
+
 def update_csv_with_extracted_data(csv_file, extracted_data):
-    new_csv_file = os.path.splitext(csv_file)[0] + '_extracted.csv'
-    file_exists = os.path.isfile(new_csv_file)
-    with open(new_csv_file, mode='a' if file_exists else 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=extracted_data[0].keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerows(extracted_data)
+    new_csv_file = extracted_csv_path(csv_file)
+    SHARED_STORE.append_rows(new_csv_file, extracted_data)
     print(f"Text extracted from PDFs and saved in '{new_csv_file}'.")
 
 def log_error(log_file_path, heading, pdf_link, error_message, date):
@@ -74,42 +200,58 @@ def find_pdf_file_path(pdf_name, date_folder_path):
 
 def check_for_digital_signature(pdf_path):
     try:
-        pdf_document = fitz.open(pdf_path)
-        for sig in pdf_document.signatures():
-            return True
-        return False
+        with fitz_lock:
+            pdf_document = fitz.open(pdf_path)
+            for sig in pdf_document.signatures():
+                return True
+            return False
     except Exception as e:
         print(f"Error checking for digital signature in PDF: {e}")
         return False
 
-def process_pdf(pdf_link, heading, category, date_folder_path, log_file_path, date):
-    try:
-        first_word = sanitize_filename(heading.split()[0])
-        category_sanitized = sanitize_filename(category, keep_spaces=True)
-        pdf_name = f"{first_word}_{category_sanitized}_{os.path.basename(pdf_link).split('.')[0]}"
-        pdf_file_path = find_pdf_file_path(pdf_name, date_folder_path)
+def extract_text_with_ocr(pdf_file_path, heading, pdf_link, log_file_path, date, defer_ocr=False, between_pages=None):
+    # With defer_ocr, a PDF without a text layer returns None so the caller can
+    # schedule its OCR behind more urgent work.
+    extracted_text = extract_text_from_pdf(pdf_file_path)
 
-        # print(f"Looking for PDF file at: {pdf_file_path}")
+    if not extracted_text.strip():
+        if defer_ocr:
+            return None
+        print(f"No text found in PDF, attempting OCR on: {pdf_file_path}")
+        ocr_pdf_path = pdf_file_path.replace('.pdf', '_ocr.pdf')
+        extracted_text = ocr_pdf_tiered(pdf_file_path, ocr_pdf_path, ocr_stats_path(log_file_path), between_pages=between_pages)
 
-        if pdf_file_path:
-            # print(f"Found PDF file: {pdf_file_path}")
+        if extracted_text.strip():
+            if os.path.exists(ocr_pdf_path):
+                os.remove(ocr_pdf_path)
+        else:
+            print(f"Text extraction failed from OCR PDF: {ocr_pdf_path}. Keeping the file for review.")
+            log_error(log_file_path, heading, pdf_link, "Text extraction failed even after OCR", date)
 
-            extracted_text = extract_text_from_pdf(pdf_file_path)
+    return extracted_text
 
-            if not extracted_text.strip():
-                print(f"No text found in PDF, attempting OCR on: {pdf_file_path}")
-                ocr_pdf_path = pdf_file_path.replace('.pdf', '_ocr.pdf')
-                ocr_pdf(pdf_file_path, ocr_pdf_path)
+def is_extraction_error(text):
+    return text.startswith(("PDF file for link", "Failed to extract text from"))
 
-                extracted_text = extract_text_from_pdf(ocr_pdf_path)
+def has_usable_text(text):
+    # Only real extracted text may be reused for a duplicate filing
+    return isinstance(text, str) and bool(text.strip()) and not is_extraction_error(text)
 
-                if extracted_text.strip():
-                    os.remove(ocr_pdf_path)
-                else:
-                    print(f"Text extraction failed from OCR PDF: {ocr_pdf_path}. Keeping the file for review.")
-                    log_error(log_file_path, heading, pdf_link, "Text extraction failed even after OCR", date)
+def locate_pdf(pdf_link, heading, category, date_folder_path):
+    first_word = sanitize_filename(heading.split()[0])
+    category_sanitized = sanitize_filename(category, keep_spaces=True)
+    pdf_name = f"{first_word}_{category_sanitized}_{os.path.basename(pdf_link).split('.')[0]}"
+    return find_pdf_file_path(pdf_name, date_folder_path)
+
+def process_pdf(pdf_link, heading, category, date_folder_path, log_file_path, date, defer_ocr=False):
+    try:
+        pdf_file_path = locate_pdf(pdf_link, heading, category, date_folder_path)
 
-            return extracted_text
+        # print(f"Looking for PDF file at: {pdf_file_path}")
+
+        if pdf_file_path:
+            # print(f"Found PDF file: {pdf_file_path}")
+            return extract_text_with_ocr(pdf_file_path, heading, pdf_link, log_file_path, date, defer_ocr)
         else:
             print(f"PDF file for link {pdf_link} not found in {date_folder_path}")
             log_error(log_file_path, heading, pdf_link, "PDF file not found", date)
@@ -122,7 +264,7 @@ def process_pdf(pdf_link, heading, category, date_folder_path, log_file_path, da
 
 def extract_data_from_csv(csv_file_path):
     try:
-        df = pd.read_csv(csv_file_path, on_bad_lines='skip')
+        df = SHARED_STORE.read_csv(csv_file_path, on_bad_lines='skip')
         if df.empty:
             print(f"No data found in {csv_file_path}")
             return None
@@ -131,7 +273,19 @@ def extract_data_from_csv(csv_file_path):
         print(f"Error processing {csv_file_path}: {e}")
         return None
 
-def process_csv_file(csv_file_path, date_folder_path, year_folder, month_folder, date_folder, log_file_path):
+def build_extracted_row(row, extracted_text, date):
+    return {
+        'HEADING': row['HEADING'],
+        'ANNOUNCEMENT': row['ANNOUNCEMENT'],
+        'INSIDER': row['INSIDER'],
+        'PDF LINK': row['PDF LINK'],
+        'CATEGORY': row['CATEGORY'],
+        'Extracted Data': clean_text(extracted_text),
+        'Date': date,
+        'flag': 1
+    }
+
+def process_csv_file(csv_file_path, date_folder_path, year_folder, month_folder, date_folder, log_file_path, company_names=None):
     csv_files = [f for f in os.listdir(date_folder_path) if f.lower().endswith('.csv')]
 
     for csv_file in csv_files:
@@ -142,14 +296,14 @@ def process_csv_file(csv_file_path, date_folder_path, year_folder, month_folder,
         csv_file_path = os.path.join(date_folder_path, csv_file)
         print(f"Processing CSV file: {csv_file_path}")
 
-        extracted_file = os.path.splitext(csv_file)[0] + '_extracted.csv'
-        extracted_file_path = os.path.join(date_folder_path, extracted_file)
+        extracted_file_path = extracted_csv_path(csv_file_path)
+        extracted_file = os.path.basename(extracted_file_path)
         
         existing_extracted_data = None
         if os.path.isfile(extracted_file_path):
             # print(f"Extracted file '{extracted_file}' already exists. Checking for already processed entries.")
             try:
-                existing_extracted_data = pd.read_csv(extracted_file_path, on_bad_lines='skip')
+                existing_extracted_data = SHARED_STORE.read_csv(extracted_file_path, on_bad_lines='skip')
             except Exception as e:
                 print(f"Error reading existing extracted file '{extracted_file}': {e}")
                 existing_extracted_data = None
@@ -165,7 +319,38 @@ def process_csv_file(csv_file_path, date_folder_path, year_folder, month_folder,
             if 'flag' not in extracted_data.columns:
                 extracted_data['flag'] = 0
 
-            for _, row in extracted_data.iterrows():
+            deduplicator = DEDUP.AnnouncementDeduplicator(DEDUP.fingerprint_path(date_folder_path), SCHEME_FILTER.keywords_pattern)
+            known_texts = {}
+            if existing_extracted_data is not None:
+                known_texts = {
+                    link: text
+                    for link, text in zip(existing_extracted_data['PDF LINK'], existing_extracted_data['Extracted Data'])
+                    if has_usable_text(text)
+                }
+            reused_rows = 0
+            ocr_rows = []
+            date = extract_date_from_folder(year_folder, month_folder, date_folder)
+            latency = PRIORITY.LatencyStats()
+            extracted_tiers = []
+
+            def add_extracted_row(row, extracted_text, reused=False):
+                if not reused and has_usable_text(extracted_text):
+                    known_texts[row['PDF LINK']] = clean_text(extracted_text)
+                    deduplicator.check_body(row, extracted_text)
+                extracted_rows.append(build_extracted_row(row, extracted_text, date))
+                extracted_tiers.append(PRIORITY.priority_tier(row['PRIORITY']))
+
+            def save_extracted_rows():
+                update_csv_with_extracted_data(csv_file_path, extracted_rows)
+                # Latency runs until the rows are written
+                for extracted_row, tier in zip(extracted_rows, extracted_tiers):
+                    latency.record(tier, PRIORITY.filing_latency(extracted_row))
+                extracted_rows.clear()
+                extracted_tiers.clear()
+
+            # Highest priority first. PDFs that need OCR wait until every PDF
+            # with a text layer is done, then run in the same priority order.
+            for _, row in PRIORITY.sort_by_priority(extracted_data, company_names).iterrows():
                 pdf_link = row['PDF LINK']
                 heading = row['HEADING']
                 category = row['CATEGORY']
@@ -177,37 +362,46 @@ def process_csv_file(csv_file_path, date_folder_path, year_folder, month_folder,
                         # print(f"PDF link '{pdf_link}' already processed (flag is 1). Skipping.")
                         continue
 
-                extracted_text = process_pdf(pdf_link, heading, category, date_folder_pdfs_path, log_file_path, extract_date_from_folder(year_folder, month_folder, date_folder))
-
-                extracted_row = {
-                    'HEADING': heading,
-                    'ANNOUNCEMENT': row['ANNOUNCEMENT'],
-                    'INSIDER': row['INSIDER'],
-                    'PDF LINK': pdf_link,
-                    'CATEGORY': category,
-                    'Extracted Data': clean_text(extracted_text),
-                    'Date': extract_date_from_folder(year_folder, month_folder, date_folder),
-                    'flag': 1  
-                }
-                extracted_rows.append(extracted_row)
+                # A heading match is only a candidate; the attachment or the
+                # extracted body has to confirm it
+                deduplicator.find_candidate(row)
+                try:
+                    pdf_file_path = locate_pdf(pdf_link, heading, category, date_folder_pdfs_path)
+                except Exception:
+                    pdf_file_path = None
+                original = deduplicator.check_attachment(row, pdf_file_path) if pdf_file_path else None
+                if original in known_texts:
+                    add_extracted_row(row, known_texts[original], reused=True)
+                    reused_rows += 1
+                    continue
+
+                extracted_text = process_pdf(pdf_link, heading, category, date_folder_pdfs_path, log_file_path, date, defer_ocr=True)
+                if extracted_text is None:
+                    ocr_rows.append(row)
+                    continue
+                add_extracted_row(row, extracted_text)
+
+            if extracted_rows and ocr_rows:
+                # Publish text-layer results before the slow OCR pass starts
+                save_extracted_rows()
+
+            for row in ocr_rows:
+                extracted_text = process_pdf(row['PDF LINK'], row['HEADING'], row['CATEGORY'], date_folder_pdfs_path, log_file_path, date)
+                add_extracted_row(row, extracted_text)
+
+            if reused_rows:
+                print(f"Reused extracted text for {reused_rows} filings with an identical attachment.")
 
             if extracted_rows:
-                update_csv_with_extracted_data(csv_file_path, extracted_rows)
+                save_extracted_rows()
+
+            latency.report(os.path.join(os.path.dirname(log_file_path), "Priority_latency_log.csv"))
 
 
-def update_csv_with_extracted_data(csv_file, extracted_data):
-    new_csv_file = os.path.splitext(csv_file)[0] + '_extracted.csv'
-    file_exists = os.path.isfile(new_csv_file)
-    with open(new_csv_file, mode='a' if file_exists else 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=extracted_data[0].keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerows(extracted_data)
-    print(f"Text extracted from PDFs and saved in '{new_csv_file}'.")
 
 
 
-def process_csv_files(input_path, log_file_path):
+def process_csv_files(input_path, log_file_path, company_names=None):
 
     yesterday = datetime.now()
     # day = '04-10-2024'
@@ -225,7 +419,7 @@ def process_csv_files(input_path, log_file_path):
             date_folder_path = os.path.join(month_folder_path, day_str)
             if os.path.isdir(date_folder_path):
                 # print(f"Processing date folder: {day_str}")
-                process_csv_file(date_folder_path, date_folder_path, year_str, month_str, day_str, log_file_path)
+                process_csv_file(date_folder_path, date_folder_path, year_str, month_str, day_str, log_file_path, company_names)
             else:
                 print(f"Date folder '{day_str}' does not exist.")
         else:
@@ -233,10 +427,13 @@ def process_csv_files(input_path, log_file_path):
     else:
         print(f"Year folder '{year_str}' does not exist.")
 
-def main(input_path):
+def main(input_path, company_names_file=None):
     log_file_path = os.path.join(input_path, "Scheme_extraction_errors_log.csv")
-    process_csv_files(input_path, log_file_path)
+    company_names = SCHEME_FILTER.load_company_names(company_names_file) if company_names_file else None
+    process_csv_files(input_path, log_file_path, company_names)
+    print_ocr_stats()
 
 if __name__ == "__main__":
     input_path = r'D:\Output\BSE DATA' 
-    main(input_path)
\ No newline at end of file
+    company_names_file = r'D:\CODES\BSE_AUTO\Companies_F&O.csv'
+    main(input_path, company_names_file)
\ No newline at end of file